@@ -114,6 +114,12 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Test runs export FAST_PASSWORD_HASHER=1 to skip slow password hashing.
+if bool(int(os.environ.get('FAST_PASSWORD_HASHER', 0))):
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -1,27 +1,48 @@
 """
 Django command to wait for the database to be available
 """
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
+    base_delay = 0.1
+    max_delay = 5
+    jitter = 0.5
+    max_attempts = 30
+
+    def _backoff_delay(self, attempt):
+        """Return the jittered exponential delay before the next attempt."""
+        delay = self.base_delay * 2 ** attempt
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return min(self.max_delay, delay)
 
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
         db_up = False
+        attempt = 0
         while db_up is False:
             try:
-                self.check(databases=['default'])
+                connections['default'].ensure_connection()
                 db_up = True
             except (Psycopg2OpError, OperationalError):
-                self.stdout.write("Databse unvailable, waiting 1 second...")
-                time.sleep(1)
+                if attempt + 1 >= self.max_attempts:
+                    raise CommandError(
+                        f'Database unavailable after {attempt + 1} attempts.'
+                    )
+                delay = self._backoff_delay(attempt)
+                self.stdout.write(
+                    f'Database unavailable, waiting {delay:.2f} seconds...'
+                )
+                time.sleep(delay)
+                attempt += 1
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-15 09:10
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Keep one tag/ingredient per (user, name) and relink experiments."""
+    Experiment = apps.get_model('core', 'Experiment')
+    relations = (('Tag', 'tags'), ('Ingredient', 'ingredients'))
+    for model_name, relation in relations:
+        model = apps.get_model('core', model_name)
+        through = getattr(Experiment, relation).through
+        target = f'{model_name.lower()}_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'),
+            total=Count('id'),
+        ).filter(total__gt=1)
+        for duplicate in duplicates:
+            extra = model.objects.filter(
+                user=duplicate['user'],
+                name=duplicate['name'],
+            ).exclude(id=duplicate['keep'])
+            links = through.objects.filter(**{f'{target}__in': extra})
+            experiment_ids = set(links.values_list('experiment_id', flat=True))
+            through.objects.bulk_create(
+                [
+                    through(
+                        experiment_id=experiment_id,
+                        **{target: duplicate['keep']},
+                    )
+                    for experiment_id in experiment_ids
+                ],
+                ignore_conflicts=True,
+            )
+            links.delete()
+            extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_experiment_ingredients'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
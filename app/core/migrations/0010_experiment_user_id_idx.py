@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_unique_tag_ingredient_name_per_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='experiment',
+            index=models.Index(fields=['user', '-id'], name='experiment_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:05
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_experiment_user_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(django.db.models.expressions.F('user'), django.db.models.expressions.OrderBy(django.db.models.functions.text.Lower('name'), descending=True), name='ingredient_user_lname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(django.db.models.expressions.F('user'), django.db.models.expressions.OrderBy(django.db.models.functions.text.Lower('name'), descending=True), name='tag_user_lname_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_tag_ingredient_user_lname_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experiment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -6,6 +6,7 @@ import os
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -69,6 +70,15 @@ class Experiment(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=experiment_image_file_path)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='experiment_user_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -82,6 +92,22 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                'user',
+                Lower('name').desc(),
+                models.F('id').desc(),
+                name='tag_user_lname_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -94,5 +120,21 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                'user',
+                Lower('name').desc(),
+                models.F('id').desc(),
+                name='ingredient_user_lname_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.name
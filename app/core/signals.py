@@ -0,0 +1,46 @@
+"""
+Signal handlers keeping Experiment.updated_at in step with what it renders.
+"""
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    Experiment,
+    Tag,
+    Ingredient,
+)
+
+
+def touch_experiments(experiments):
+    """Mark experiments as modified without running their save()."""
+    experiments.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_on_rename(sender, instance, created, **kwargs):
+    """Touch experiments showing a saved tag or ingredient."""
+    if not created:
+        touch_experiments(instance.experiment_set.all())
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_on_delete(sender, instance, **kwargs):
+    """Touch experiments showing a tag or ingredient about to be deleted."""
+    # The relation rows are gone by post_delete.
+    touch_experiments(instance.experiment_set.all())
+
+
+@receiver(m2m_changed, sender=Experiment.tags.through)
+@receiver(m2m_changed, sender=Experiment.ingredients.through)
+def touch_on_relink(sender, instance, action, reverse, pk_set, **kwargs):
+    """Touch experiments whose tags or ingredients were changed."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_experiments(Experiment.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        touch_experiments(Experiment.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        touch_experiments(instance.experiment_set.all())
@@ -3,32 +3,58 @@ Test custom Django management commands.
 """
 from unittest.mock import patch
 
-from psycopg2 import OperationalError as Psychopg2Error
+from psycopg2 import OperationalError as Psycopg2OpError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
 
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch('core.management.commands.wait_for_db.connections')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_connections):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        ensure_connection = patched_connections['default'].ensure_connection
 
         call_command('wait_for_db')
 
-        patched_check.asert_called_once_with(databases=['default'])
+        ensure_connection.assert_called_once_with()
 
     @patch("time.sleep")
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_connections):
         """Test waiting for database when getting operationalError"""
-        patched_check.side_effect = [Psychopg2Error] * 2 \
-            + [OperationalError]*3 + [True]
+        ensure_connection = patched_connections['default'].ensure_connection
+        ensure_connection.side_effect = [Psycopg2OpError] * 2 \
+            + [OperationalError]*3 + [None]
 
         call_command('wait_for_db')
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(ensure_connection.call_count, 6)
+        patched_connections.__getitem__.assert_called_with('default')
+
+    @patch("time.sleep")
+    def test_wait_for_db_backs_off(self, patched_sleep, patched_connections):
+        """Test delays between retries grow and stay under the cap."""
+        ensure_connection = patched_connections['default'].ensure_connection
+        ensure_connection.side_effect = [OperationalError] * 8 + [None]
+
+        call_command('wait_for_db')
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertEqual(len(delays), 8)
+        self.assertLess(delays[0], delays[3])
+        self.assertTrue(all(0 < d <= 5 for d in delays))
+
+    @patch("time.sleep")
+    def test_wait_for_db_gives_up(self, patched_sleep, patched_connections):
+        """Test the command fails once the attempt limit is reached."""
+        ensure_connection = patched_connections['default'].ensure_connection
+        ensure_connection.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db')
+
+        self.assertEqual(ensure_connection.call_count, 30)
@@ -4,6 +4,7 @@ Tests for models.
 from unittest.mock import patch
 from decimal import Decimal
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -78,6 +79,14 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
     def test_create_ingredient(self):
         """Test creating an ingredient is successful."""
         user = create_user()
@@ -96,3 +105,39 @@ class ModelTests(TestCase):
         file_path = models.experiment_image_file_path(None, 'example.jpg')
 
         self.assertEqual(file_path, f'uploads/experiment/{uuid}.jpg')
+
+    def test_experiment_touched_by_related_changes(self):
+        """Test tag and ingredient changes update experiment updated_at."""
+        user = create_user()
+        experiment = models.Experiment.objects.create(
+            user=user,
+            title='Sample experiment name',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        tag = models.Tag.objects.create(user=user, name='Tag1')
+        ingredient = models.Ingredient.objects.create(
+            user=user,
+            name='Ingredient1',
+        )
+        changes = [
+            ('add tag', lambda: experiment.tags.add(tag)),
+            ('rename tag', lambda: models.Tag.objects.get(
+                pk=tag.pk,
+            ).save()),
+            ('link ingredient', lambda: ingredient.experiment_set.add(
+                experiment,
+            )),
+            ('clear ingredient', lambda: ingredient.experiment_set.clear()),
+            ('delete tag', lambda: models.Tag.objects.filter(
+                pk=tag.pk,
+            ).delete()),
+        ]
+        for label, change in changes:
+            with self.subTest(label):
+                updated_at = models.Experiment.objects.get(
+                    pk=experiment.pk,
+                ).updated_at
+                change()
+                experiment.refresh_from_db()
+                self.assertGreater(experiment.updated_at, updated_at)
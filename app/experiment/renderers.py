@@ -0,0 +1,26 @@
+"""
+Renderers for experiment APIs.
+"""
+import orjson
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Render JSON with orjson."""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    # Covers the types orjson does not know, such as lazy strings.
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON bytes."""
+        if data is None:
+            return b''
+
+        return orjson.dumps(
+            data,
+            default=self.encoder.default,
+            option=orjson.OPT_NAIVE_UTC,
+        )
@@ -1,6 +1,23 @@
 """
 Serializers for experiment API.
 """
+import copy
+import functools
+
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import (
+    Manager,
+    Model,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    prefetch_related_objects,
+)
+from django.db.models.functions import JSONObject
+from django.utils.functional import cached_property
+
 from rest_framework import serializers
 
 from core.models import (
@@ -10,25 +27,167 @@ from core.models import (
 )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+@functools.lru_cache(maxsize=None)
+def _prefetch_plan(serializer_class):
+    """Return (relation, columns) pairs for the to-many fields rendered."""
+    model = serializer_class.Meta.model
+    plan = []
+    for name, field in serializer_class._declared_fields.items():
+        if field.write_only or name not in serializer_class.Meta.fields:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source or name)
+        except FieldDoesNotExist:
+            continue
+        if not (model_field.many_to_many or model_field.one_to_many):
+            continue
+        child = getattr(field, 'child', field)
+        columns = ()
+        if isinstance(child, serializers.ModelSerializer):
+            columns = tuple(child.Meta.fields)
+        plan.append((model_field.name, columns))
+
+    return tuple(plan)
+
+
+def _relation_prefetches(serializer_class, user_id=None):
+    """Return user-scoped prefetches for the relations serializer renders."""
+    model = serializer_class.Meta.model
+    prefetches = []
+    for name, columns in _prefetch_plan(serializer_class):
+        related_model = model._meta.get_field(name).related_model
+        queryset = related_model.objects.all()
+        if columns:
+            queryset = queryset.only(*columns)
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        prefetches.append(Prefetch(name, queryset=queryset))
+
+    return prefetches
+
+
+def _relation_items(relation, target, user_id):
+    """Return a subquery aggregating an experiment relation to JSON."""
+    through = getattr(Experiment, relation).through
+    return Subquery(
+        through.objects.filter(
+            experiment=OuterRef('pk'),
+            **{f'{target}__user_id': user_id},
+        ).values('experiment').annotate(
+            items=JSONBAgg(
+                JSONObject(id=f'{target}_id', name=f'{target}__name'),
+            ),
+        ).values('items')
+    )
+
+
+class NameListSerializer(serializers.ListSerializer):
+    """Validate lists of plain names with the name field alone."""
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not (data or self.allow_empty):
+            return super().to_internal_value(data)
+
+        name_field = self.child.fields['name']
+        validated = []
+        for item in data:
+            if not isinstance(item, dict) or 'name' not in item:
+                return super().to_internal_value(data)
+            try:
+                name = name_field.run_validation(item['name'])
+            except serializers.ValidationError:
+                # Let the full path report errors per item.
+                return super().to_internal_value(data)
+            validated.append({'name': name})
+
+        return validated
+
+
+class UniqueNameMixin:
+    """Reject renaming an item onto another item of the same user."""
+
+    def validate_name(self, value):
+        # Nested items have no instance; they reuse existing names.
+        if self.instance is None:
+            return value
+
+        model = type(self.instance)
+        duplicates = model.objects.filter(
+            user_id=self.instance.user_id,
+            name=value,
+        ).exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(
+                f'{model._meta.verbose_name.capitalize()} with this name '
+                'already exists.'
+            )
+        return value
+
+
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serialize for ingredient."""
 
     class Meta:
         model = Ingredient
         fields = ['id', 'name']
-        read_only_fields = ['id']
+        list_serializer_class = NameListSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for tag."""
 
     class Meta:
         model = Tag
         fields = ['id', 'name']
-        read_only_fields = ['id']
+        list_serializer_class = NameListSerializer
+
 
+class CachedFieldsMixin:
+    """Build model serializer fields once per class and copy them."""
 
-class ExperimentSerializer(serializers.ModelSerializer):
+    def get_fields(self):
+        cls = type(self)
+        if '_cached_fields' not in cls.__dict__:
+            cls._cached_fields = super().get_fields()
+        return copy.deepcopy(cls._cached_fields)
+
+    @cached_property
+    def _readable_fields(self):
+        # DRF rebuilds this generator for every serialized row.
+        return [
+            field for field in self.fields.values() if not field.write_only
+        ]
+
+
+class ExperimentListSerializer(serializers.ListSerializer):
+    """Serialize experiments, loading nested relations in one batch.
+
+    The list view passes value rows that already carry their relations.
+    Model instances only arrive from ad-hoc ``many=True`` use, such as
+    scripts and tests, and get their relations prefetched here.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        experiments = list(iterable)
+        if experiments and isinstance(experiments[0], Model):
+            request = self.context.get('request')
+            prefetch_related_objects(
+                experiments,
+                *_relation_prefetches(
+                    type(self.child),
+                    getattr(getattr(request, 'user', None), 'pk', None),
+                ),
+            )
+        return self._represent(experiments)
+
+    def _represent(self, items):
+        """Serialize items with the shared child's bound method."""
+        represent = self.child.to_representation
+        return [represent(item) for item in items]
+
+
+class ExperimentSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for Experiments."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -39,7 +198,43 @@ class ExperimentSerializer(serializers.ModelSerializer):
             'id', 'title', 'time_minutes', 'price', 'link', 'tags',
             'ingredients',
         ]
-        read_only_field = ['id']
+        list_serializer_class = ExperimentListSerializer
+
+    @classmethod
+    def _columns(cls):
+        """Return the model columns rendered by this serializer."""
+        return [
+            field for field in cls.Meta.fields
+            if field not in cls._declared_fields
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, user_id=None):
+        """Load only the columns and relations this serializer renders."""
+        return queryset.select_related('user').only(
+            'user',
+            *cls._columns(),
+        ).prefetch_related(*_relation_prefetches(cls, user_id))
+
+    @classmethod
+    def setup_values(cls, queryset, user_id):
+        """Return the rendered columns and relations of queryset as dicts."""
+        return queryset.values(*cls._columns()).annotate(
+            tag_items=_relation_items('tags', 'tag', user_id),
+            ingredient_items=_relation_items(
+                'ingredients',
+                'ingredient',
+                user_id,
+            ),
+        )
+
+    @classmethod
+    def attach_relations(cls, rows):
+        """Move aggregated relation items onto the serialized keys."""
+        for row in rows:
+            row['tags'] = row.pop('tag_items') or []
+            row['ingredients'] = row.pop('ingredient_items') or []
+            yield row
 
 
 class ExperimentDetailSerializer(ExperimentSerializer):
@@ -48,26 +243,27 @@ class ExperimentDetailSerializer(ExperimentSerializer):
     class Meta(ExperimentSerializer.Meta):
         fields = ExperimentSerializer.Meta.fields + ['description', 'image']
 
+    def _bulk_get_or_create(self, model, items):
+        """Return objects of model for items, creating missing ones."""
+        auth_user = self.context['request'].user
+        names = {item['name'] for item in items}
+        model.objects.bulk_create(
+            [model(user=auth_user, name=name) for name in names],
+            ignore_conflicts=True,
+        )
+        return list(model.objects.filter(user=auth_user, name__in=names))
+
     def _get_or_create_tags(self, tags, experiment):
         """Handle getting or creating tags on as needed."""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            experiment.tags.add(tag_obj)
+        experiment.tags.set(self._bulk_get_or_create(Tag, tags))
 
     def _get_or_create_ingredients(self, ingredients, experiment):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, create = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            experiment.ingredients.add(ingredient_obj)
+        experiment.ingredients.set(
+            self._bulk_get_or_create(Ingredient, ingredients)
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         """Create a experiment."""
         tags = validated_data.pop('tags', [])
@@ -77,15 +273,14 @@ class ExperimentDetailSerializer(ExperimentSerializer):
         self._get_or_create_ingredients(ingredients, experiment)
         return experiment
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update experimrnt."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
-            instance.tags.clear()
             self._get_or_create_tags(tags, instance)
         if ingredients is not None:
-            instance.ingredients.clear()
             self._get_or_create_ingredients(ingredients, instance)
 
         for attr, value in validated_data.items():
@@ -101,5 +296,11 @@ class ExperiemntImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Experiment
         fields = ['id', 'image']
-        read_only_fields = ['id']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, user_id=None):
+        """Load only the columns an image upload reads and writes."""
+        # Saving a deferred instance writes only loaded fields, so
+        # updated_at must be loaded for auto_now to be saved.
+        return queryset.only(*cls.Meta.fields, 'updated_at')
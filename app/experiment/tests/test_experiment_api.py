@@ -2,16 +2,20 @@
 Test for experiment APIs.
 """
 from decimal import Decimal
+import json
 import tempfile
 import os
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from core.models import (
@@ -31,7 +35,7 @@ EXPERIMENT_URL = reverse('experiment:experiment-list')
 
 def detail_url(experiment_id):
     """Create and return a experiment URL."""
-    return reverse('experiment:experiment-detail', args=[experiment_id])
+    return f'{EXPERIMENT_URL}{experiment_id}/'
 
 
 def image_upload_url(experiment_id):
@@ -75,12 +79,15 @@ class PublicExperimentAPITest(TestCase):
 class PrivateExperimentApiTest(TestCase):
     """Test authenticated API request."""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(
             email='test@example.com',
             password='testpass123'
             )
+
+    def setUp(self):
+        self.client = APIClient()
         self.client.force_authenticate(self.user)
 
     def test_retrieve_experiment(self):
@@ -91,9 +98,12 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.get(EXPERIMENT_URL)
 
         experiments = Experiment.objects.all().order_by('id')
-        serializer = ExperimentSerializer(experiments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data), experiments.count())
+        self.assertEqual(
+            [e['id'] for e in res.data],
+            list(experiments.values_list('id', flat=True)),
+        )
 
     def test_experiment_list_limited_to_user(self):
         """Test list of experiments is limited to authenticated user."""
@@ -108,9 +118,128 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.get(EXPERIMENT_URL)
 
         experiments = Experiment.objects.filter(user=self.user)
-        serializer = ExperimentSerializer(experiments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data), experiments.count())
+        self.assertEqual(
+            {e['id'] for e in res.data},
+            set(experiments.values_list('id', flat=True)),
+        )
+
+    def test_list_experiments_paginated(self):
+        """Test listing experiments with a limit returns one page."""
+        experiments = [create_experiment(user=self.user) for _ in range(3)]
+
+        res = self.client.get(EXPERIMENT_URL, {'limit': 2, 'offset': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(
+            [e['id'] for e in res.data['results']],
+            [e.id for e in experiments[1:]],
+        )
+
+    def test_list_experiments_paginated_counts_ids(self):
+        """Test a paginated list aggregates relations for its page only."""
+        create_experiment(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(EXPERIMENT_URL, {'limit': 1})
+
+        count_sql, ids_sql, rows_sql = [q['sql'] for q in queries]
+        self.assertIn('COUNT(', count_sql)
+        self.assertNotIn('JSONB_AGG', count_sql + ids_sql)
+        self.assertNotIn('DISTINCT', count_sql + ids_sql + rows_sql)
+        self.assertIn('JSONB_AGG', rows_sql)
+
+    def test_list_experiments_single_query(self):
+        """Test listing experiments and their relations is one query."""
+        for i in range(3):
+            experiment = create_experiment(user=self.user)
+            experiment.tags.add(
+                Tag.objects.create(user=self.user, name=f'tag {i}')
+            )
+            experiment.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'ing {i}')
+            )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(EXPERIMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+    def test_list_experiments_sharing_tag(self):
+        """Test a tag shared by experiments is rendered for each of them."""
+        tag = Tag.objects.create(user=self.user, name='Shared')
+        e1 = create_experiment(user=self.user)
+        e2 = create_experiment(user=self.user)
+        e1.tags.add(tag)
+        e2.tags.add(tag)
+
+        res = self.client.get(EXPERIMENT_URL)
+
+        expected = [{'id': tag.id, 'name': tag.name}]
+        self.assertEqual([e['tags'] for e in res.data], [expected] * 2)
+
+    def test_serialize_experiments_batches_relations(self):
+        """Test serializing many experiments loads relations in bulk."""
+        for i in range(3):
+            experiment = create_experiment(user=self.user)
+            experiment.tags.add(
+                Tag.objects.create(user=self.user, name=f'tag {i}')
+            )
+
+        experiments = Experiment.objects.filter(user=self.user)
+        with self.assertNumQueries(3):
+            data = ExperimentSerializer(experiments, many=True).data
+
+        self.assertEqual([len(e['tags']) for e in data], [1, 1, 1])
+
+    def test_list_experiments_renders_json(self):
+        """Test the experiment list is rendered as JSON."""
+        create_experiment(user=self.user)
+
+        res = self.client.get(EXPERIMENT_URL)
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.json(), res.data)
+
+    def test_list_experiments_resolves_token_once(self):
+        """Test token authentication looks up the user once per request."""
+        create_experiment(user=self.user)
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        with self.assertNumQueries(2):
+            res = client.get(EXPERIMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_experiments_deleted_token(self):
+        """Test a deleted token is rejected."""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        client.get(EXPERIMENT_URL)
+
+        token.delete()
+        res = client.get(EXPERIMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_experiments_inactive_user_token(self):
+        """Test a deactivated user's token is rejected."""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        client.get(EXPERIMENT_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = client.get(EXPERIMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_get_experiment_detail(self):
         """Test get experiment detail."""
@@ -122,6 +251,61 @@ class PrivateExperimentApiTest(TestCase):
         serializer = ExperimentDetailSerializer(experiment)
         self.assertEqual(res.data, serializer.data)
 
+    def test_get_experiment_detail_query_count(self):
+        """Test experiment detail loads in at most four queries."""
+        experiment = create_experiment(user=self.user)
+        experiment.tags.add(Tag.objects.create(user=self.user, name='Tag'))
+
+        url = detail_url(experiment.id)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_get_experiment_detail_not_modified(self):
+        """Test an unchanged experiment detail returns 304 in one query."""
+        experiment = create_experiment(user=self.user)
+        url = detail_url(experiment.id)
+        res = self.client.get(url)
+        etag = res['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_experiment_detail_modified(self):
+        """Test changing an experiment or its tags refreshes the ETag."""
+        experiment = create_experiment(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Tag')
+        experiment.tags.add(tag)
+        url = detail_url(experiment.id)
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(url, {'title': 'New title'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+        etag = res['ETag']
+        self.client.patch(
+            reverse('experiment:tag-detail', args=[tag.id]),
+            {'name': 'Renamed'},
+        )
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Renamed')
+
     def test_create_experiment(self):
         """Test creating a experiment."""
         payload = {
@@ -226,16 +410,13 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.post(EXPERIMENT_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        experiments = Experiment.objects.filter(user=self.user)
-        self.assertEqual(experiments.count(), 1)
-        experiment = experiments[0]
-        self.assertEqual(experiment.tags.count(), 2)
-        for tag in payload['tags']:
-            exists = experiment.tags.filter(
-                name=tag['name'],
-                user=self.user
-            ).exists()
-            self.assertTrue(exists)
+        experiment = Experiment.objects.get(
+            id=res.data['id'],
+            user=self.user,
+        )
+        names = experiment.tags.values_list('name', flat=True)
+        expected = {t['name'] for t in payload['tags']}
+        self.assertEqual(set(names), expected)
 
     def test_create_experiment_with_existing_tags(self):
         """Test create a experiment with existing tag."""
@@ -249,17 +430,61 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.post(EXPERIMENT_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        experiments = Experiment.objects.filter(user=self.user)
-        self.assertEqual(experiments.count(), 1)
-        experiment = experiments[0]
-        self.assertEqual(experiment.tags.count(), 2)
-        self.assertIn(tag_BNU, experiment.tags.all())
-        for tag in payload['tags']:
-            exists = experiment.tags.filter(
-                name=tag['name'],
-                user=self.user,
-            ).exists()
-            self.assertTrue(exists)
+        experiment = Experiment.objects.get(
+            id=res.data['id'],
+            user=self.user,
+        )
+        tag_ids = experiment.tags.values_list('id', flat=True)
+        self.assertIn(tag_BNU.id, set(tag_ids))
+        names = experiment.tags.values_list('name', flat=True)
+        expected = {t['name'] for t in payload['tags']}
+        self.assertEqual(set(names), expected)
+
+    def test_create_experiment_with_invalid_tag(self):
+        """Test creating a experiment with a blank tag name fails."""
+        payload = {
+            'title': 'Blank tag',
+            'time_minutes': 10,
+            'price': Decimal('1'),
+            'tags': [{'name': 'valid'}, {'name': '  '}],
+        }
+        res = self.client.post(EXPERIMENT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Experiment.objects.filter(user=self.user).exists())
+
+    def test_create_experiment_with_null_character_tag(self):
+        """Test creating a experiment with a null character in a tag fails."""
+        payload = {
+            'title': 'Null tag',
+            'time_minutes': 10,
+            'price': Decimal('1'),
+            'tags': [{'name': 'a\x00b'}],
+        }
+        res = self.client.post(EXPERIMENT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Experiment.objects.filter(user=self.user).exists())
+
+    def test_create_experiment_with_surrogate_tag(self):
+        """Test creating a experiment with a surrogate in a tag fails."""
+        payload = {
+            'title': 'Surrogate tag',
+            'time_minutes': 10,
+            'price': Decimal('1'),
+            'tags': [{'name': 'a\ud800'}],
+        }
+        res = self.client.post(
+            EXPERIMENT_URL,
+            json.dumps(payload, default=str),
+            content_type='application/json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+        self.assertFalse(Experiment.objects.filter(user=self.user).exists())
 
     def test_create_tag_on_update(self):
         """Test creating tag when updating a experiment."""
@@ -271,7 +496,8 @@ class PrivateExperimentApiTest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         new_tag = Tag.objects.get(user=self.user, name='Morning')
-        self.assertIn(new_tag, experiment.tags.all())
+        tag_ids = experiment.tags.values_list('id', flat=True)
+        self.assertIn(new_tag.id, set(tag_ids))
 
     def test_update_experiment_assign_tag(self):
         """Test assigning an existing tag when updating a experiment."""
@@ -285,8 +511,9 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.patch(url, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(tag_afternoon, experiment.tags.all())
-        self.assertNotIn(tag_night, experiment.tags.all())
+        tag_ids = set(experiment.tags.values_list('id', flat=True))
+        self.assertIn(tag_afternoon.id, tag_ids)
+        self.assertNotIn(tag_night.id, tag_ids)
 
     def test_clear_experiment_tags(self):
         """Test clearing a experiment tags."""
@@ -312,16 +539,13 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.post(EXPERIMENT_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        experiments = Experiment.objects.filter(user=self.user)
-        self.assertEqual(experiments.count(), 1)
-        experiment = experiments[0]
-        self.assertEqual(experiment.ingredients.count(), 2)
-        for ingredient in payload['ingredients']:
-            exists = experiment.ingredients.filter(
-                name=ingredient['name'],
-                user=self.user,
-            ).exists()
-            self.assertTrue(exists)
+        experiment = Experiment.objects.get(
+            id=res.data['id'],
+            user=self.user,
+        )
+        names = experiment.ingredients.values_list('name', flat=True)
+        expected = {i['name'] for i in payload['ingredients']}
+        self.assertEqual(set(names), expected)
 
     def test_create_experiment_with_existing_ingredient(self):
         """Test creating a new experiment with existing ingredient."""
@@ -341,17 +565,15 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.post(EXPERIMENT_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
-        experiments = Experiment.objects.filter(user=self.user)
-        self.assertEqual(experiments.count(), 1)
-        experiment = experiments[0]
-        self.assertEqual(experiment.ingredients.count(), 2)
-        self.assertIn(ingredient, experiment.ingredients.all())
-        for ingredient in payload['ingredients']:
-            exists = experiment.ingredients.filter(
-                name=ingredient['name'],
-                user=self.user,
-            ).exists()
-            self.assertTrue(exists)
+        experiment = Experiment.objects.get(
+            id=res.data['id'],
+            user=self.user,
+        )
+        ingredient_ids = experiment.ingredients.values_list('id', flat=True)
+        self.assertIn(ingredient.id, set(ingredient_ids))
+        names = experiment.ingredients.values_list('name', flat=True)
+        expected = {i['name'] for i in payload['ingredients']}
+        self.assertEqual(set(names), expected)
 
     def test_create_ingredient_on_update(self):
         """Test creating an ingredient when updating a experiment."""
@@ -366,7 +588,8 @@ class PrivateExperimentApiTest(TestCase):
             user=self.user,
             name='ingredient1'
             )
-        self.assertIn(new_ingredient, experiment.ingredients.all())
+        ingredient_ids = experiment.ingredients.values_list('id', flat=True)
+        self.assertIn(new_ingredient.id, set(ingredient_ids))
 
     def test_update_experiment_assign_ingredient(self):
         """Test assigning an existing ingredient when updating a experiment."""
@@ -386,8 +609,11 @@ class PrivateExperimentApiTest(TestCase):
         res = self.client.patch(url, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(ingredient2, experiment.ingredients.all())
-        self.assertNotIn(ingredient1, experiment.ingredients.all())
+        ingredient_ids = set(
+            experiment.ingredients.values_list('id', flat=True)
+        )
+        self.assertIn(ingredient2.id, ingredient_ids)
+        self.assertNotIn(ingredient1.id, ingredient_ids)
 
     def test_clear_experiment_ingredients(self):
         """Test clearing a experiments ingredients."""
@@ -446,6 +672,28 @@ class PrivateExperimentApiTest(TestCase):
         self.assertNotIn(s3.data, res.data)
 
 
+class ExperimentSerializerTests(TestCase):
+    """Test experiment serializer field construction."""
+
+    def test_fields_are_not_shared_between_instances(self):
+        """Test each serializer instance binds its own fields."""
+        first = ExperimentSerializer().fields
+        second = ExperimentSerializer().fields
+
+        self.assertEqual(list(first), list(second))
+        self.assertIsNot(first['title'], second['title'])
+        self.assertIsNot(first['tags'], second['tags'])
+
+    def test_detail_serializer_keeps_own_fields(self):
+        """Test the detail serializer does not reuse list fields."""
+        ExperimentSerializer().fields
+
+        fields = ExperimentDetailSerializer().fields
+
+        self.assertIn('description', fields)
+        self.assertIn('image', fields)
+
+
 class ImageUploadTests(TestCase):
     """Test for the image upload API."""
 
@@ -476,6 +724,30 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.experiment.image.path))
 
+    def test_upload_image_modifies_experiment(self):
+        """Test uploading an image refreshes the experiment ETag."""
+        url = detail_url(self.experiment.id)
+        etag = self.client.get(url)['ETag']
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', (10, 10))
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            payload = {'image': image_file}
+            self.client.post(
+                image_upload_url(self.experiment.id),
+                payload,
+                format='multipart',
+            )
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Accept', res['Vary'])
+        self.experiment.refresh_from_db()
+        self.assertTrue(res.data['image'].endswith(self.experiment.image.url))
+        self.experiment.image.delete()
+
     def test_upload_image_bad_requesr(self):
         """Test uploading invalid image."""
         url = image_upload_url(self.experiment.id)
@@ -4,6 +4,7 @@ Test for the ingredients API.
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.test import TestCase
 
@@ -23,7 +24,7 @@ INGREDIENT_URL = reverse('experiment:ingredient-list')
 
 def detail_url(ingredient_id):
     """Create and return an ingredient detail URL."""
-    return reverse('experiment:ingredient-detail', args=[ingredient_id])
+    return f'{INGREDIENT_URL}{ingredient_id}/'
 
 
 def create_user(email='user@example.com', password='testpass123'):
@@ -47,9 +48,12 @@ class PublicIngredientsApiTests(TestCase):
 class PrivateIngredientsApiTests(TestCase):
     """Test authenticated API request."""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
         self.client = APIClient()
-        self.user = create_user()
         self.client.force_authenticate(self.user)
 
     def test_retrieve_ingredient(self):
@@ -59,7 +63,10 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENT_URL)
 
-        ingredients = Ingredient.objects.all().order_by('-name')
+        ingredients = Ingredient.objects.all().order_by(
+            Lower('name').desc(),
+            '-id',
+        )
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -93,6 +100,17 @@ class PrivateIngredientsApiTests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_update_ingredient_duplicate_name(self):
+        """Test renaming an ingredient onto another of the user's fails."""
+        Ingredient.objects.create(user=self.user, name='adults')
+        ingredient = Ingredient.objects.create(user=self.user, name='infants')
+
+        res = self.client.patch(detail_url(ingredient.id), {'name': 'adults'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'infants')
+
     def test_delete_ingredient(self):
         """Test deleting an ingredient."""
         ingredient = Ingredient.objects.create(
@@ -109,14 +127,10 @@ class PrivateIngredientsApiTests(TestCase):
 
     def test_filter_ingredients_assighed_to_experiment(self):
         """Test listing ingredients by those assigned to experiments."""
-        in1 = Ingredient.objects.create(
-            user=self.user,
-            name='ingredient test filter 1'
-            )
-        in2 = Ingredient.objects.create(
-            user=self.user,
-            name='ingredient test filter 2'
-            )
+        in1, in2 = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='ingredient test filter 1'),
+            Ingredient(user=self.user, name='ingredient test filter 2'),
+        ])
         experiment = Experiment.objects.create(
             title='iCAN',
             time_minutes=5,
@@ -134,20 +148,24 @@ class PrivateIngredientsApiTests(TestCase):
 
     def test_filtered_ingredients_unique(self):
         """Test filtered ingredients returns a unique list."""
-        ing = Ingredient.objects.create(user=self.user, name='Eggs')
-        Ingredient.objects.create(user=self.user, name='Lentils')
-        experiment1 = Experiment.objects.create(
-            title='Eggs Benedict',
-            time_minutes=60,
-            price=Decimal('100'),
-            user=self.user,
-        )
-        experiment2 = Experiment.objects.create(
-            title='Herb Eggs',
-            time_minutes=20,
-            price=Decimal('88'),
-            user=self.user
-        )
+        ing, _ = Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name='Eggs'),
+            Ingredient(user=self.user, name='Lentils'),
+        ])
+        experiment1, experiment2 = Experiment.objects.bulk_create([
+            Experiment(
+                title='Eggs Benedict',
+                time_minutes=60,
+                price=Decimal('100'),
+                user=self.user,
+            ),
+            Experiment(
+                title='Herb Eggs',
+                time_minutes=20,
+                price=Decimal('88'),
+                user=self.user,
+            ),
+        ])
         experiment1.ingredients.add(ing)
         experiment2.ingredients.add(ing)
 
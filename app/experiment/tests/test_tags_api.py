@@ -4,6 +4,7 @@ Tests for the tags API.
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.test import TestCase
 
@@ -23,7 +24,7 @@ TAGS_URL = reverse('experiment:tag-list')
 
 def detail_url(tag_id):
     """Create and return a tag detail."""
-    return reverse('experiment:tag-detail', args=[tag_id])
+    return f'{TAGS_URL}{tag_id}/'
 
 
 def create_user(email='user@example.com', password='password123'):
@@ -47,8 +48,11 @@ class PublicTagsApiTests(TestCase):
 class PrivateTagsApiTests(TestCase):
     """Test authenticated API request."""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
-        self.user = create_user()
         self.client = APIClient()
         self.client.force_authenticate(self.user)
 
@@ -59,11 +63,30 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL)
 
-        tags = Tag.objects.all().order_by('-name')
+        tags = Tag.objects.all().order_by(Lower('name').desc(), '-id')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_tags_ignores_case(self):
+        """Test tags are listed by name regardless of case."""
+        Tag.objects.create(user=self.user, name='attention')
+        Tag.objects.create(user=self.user, name='Behavior')
+
+        res = self.client.get(TAGS_URL)
+
+        names = [tag['name'] for tag in res.data]
+        self.assertEqual(names, ['Behavior', 'attention'])
+
+    def test_retrieve_tags_case_ties(self):
+        """Test tags differing only in case are listed newest first."""
+        Tag.objects.create(user=self.user, name='Eggs')
+        Tag.objects.create(user=self.user, name='eggs')
+
+        res = self.client.get(TAGS_URL, {'limit': 1, 'offset': 1})
+
+        self.assertEqual(res.data['results'][0]['name'], 'Eggs')
+
     def test_tags_limited_to_user(self):
         """Test list of tags is limited to authenticated user."""
         user2 = create_user(email='user2@example.com')
@@ -77,17 +100,60 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.data[0]['name'], tag.name)
         self.assertEqual(res.data[0]['id'], tag.id)
 
+    def test_retrieve_tags_paginated(self):
+        """Test retrieving tags with a limit returns one page."""
+        Tag.objects.bulk_create([
+            Tag(user=self.user, name=name) for name in ('a', 'b', 'c')
+        ])
+
+        res = self.client.get(TAGS_URL, {'limit': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual([t['name'] for t in res.data['results']], ['c', 'b'])
+
+    def test_retrieve_tags_not_modified(self):
+        """Test listing tags with a current ETag returns 304."""
+        tag = Tag.objects.create(user=self.user, name='fNIRS')
+        res = self.client.get(TAGS_URL)
+        etag = res['ETag']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+        tag.name = 'MEG'
+        tag.save()
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data[0]['name'], 'MEG')
+
     def test_update_tag(self):
         tag = Tag.objects.create(user=self.user, name='memory')
 
         payload = {'name': 'emotion'}
         url = detail_url(tag.id)
-        res = self.client.patch(url, payload)
+        with self.assertNumQueries(4):
+            res = self.client.patch(url, payload)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name(self):
+        """Test renaming a tag onto another of the user's tags fails."""
+        Tag.objects.create(user=self.user, name='memory')
+        tag = Tag.objects.create(user=self.user, name='emotion')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'memory'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'emotion')
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Mathmetics')
@@ -101,8 +167,10 @@ class PrivateTagsApiTests(TestCase):
 
     def test_filter_tags_assighed_to_experiment(self):
         """Test listing tags by those assigned to experiments."""
-        tag1 = Tag.objects.create(user=self.user, name='Tag test filter 1')
-        tag2 = Tag.objects.create(user=self.user, name='Tag test filter 2')
+        tag1, tag2 = Tag.objects.bulk_create([
+            Tag(user=self.user, name='Tag test filter 1'),
+            Tag(user=self.user, name='Tag test filter 2'),
+        ])
         experiment = Experiment.objects.create(
             title='tag iCAN',
             time_minutes=5,
@@ -120,20 +188,24 @@ class PrivateTagsApiTests(TestCase):
 
     def test_filtered_tags_unique(self):
         """Test filtered tags returns a unique list."""
-        tag = Tag.objects.create(user=self.user, name='Eggs')
-        Tag.objects.create(user=self.user, name='Lentils')
-        experiment1 = Experiment.objects.create(
-            title='Eggs Benedict tag test',
-            time_minutes=60,
-            price=Decimal('100'),
-            user=self.user,
-        )
-        experiment2 = Experiment.objects.create(
-            title='Herb Eggs tag test',
-            time_minutes=20,
-            price=Decimal('88'),
-            user=self.user
-        )
+        tag, _ = Tag.objects.bulk_create([
+            Tag(user=self.user, name='Eggs'),
+            Tag(user=self.user, name='Lentils'),
+        ])
+        experiment1, experiment2 = Experiment.objects.bulk_create([
+            Experiment(
+                title='Eggs Benedict tag test',
+                time_minutes=60,
+                price=Decimal('100'),
+                user=self.user,
+            ),
+            Experiment(
+                title='Herb Eggs tag test',
+                time_minutes=20,
+                price=Decimal('88'),
+                user=self.user,
+            ),
+        ])
         experiment1.tags.add(tag)
         experiment2.tags.add(tag)
 
@@ -6,15 +6,15 @@ from django.urls import (
     include,
 )
 
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 
 from experiment import views
 
 
-router = DefaultRouter()
-router.register('experiments', views.ExperimentViewSet)
-router.register('tags', views.TagViewSet)
-router.register('ingredients', views.IngredientViewSet)
+router = SimpleRouter()
+router.register('experiments', views.ExperimentViewSet, basename='experiment')
+router.register('tags', views.TagViewSet, basename='tag')
+router.register('ingredients', views.IngredientViewSet, basename='ingredient')
 
 app_name = 'experiment'
 
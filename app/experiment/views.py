@@ -1,6 +1,26 @@
 """
 Views for experiment APIs.
 """
+import hashlib
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import (
+    CharField,
+    Value,
+)
+from django.db.models.functions import (
+    MD5,
+    Cast,
+    Concat,
+    Lower,
+)
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, parse_etags, quote_etag
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -13,6 +33,9 @@ from rest_framework import (
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -23,6 +46,11 @@ from core.models import (
     Ingredient,
 )
 from experiment import serializers
+from experiment.renderers import ORJSONRenderer
+
+
+AUTH = (TokenAuthentication,)
+PERMS = (IsAuthenticated,)
 
 
 @extend_schema_view(
@@ -44,9 +72,21 @@ from experiment import serializers
 class ExperimentViewSet(viewsets.ModelViewSet):
     """View for manage experiment APIs."""
     serializer_class = serializers.ExperimentDetailSerializer
+    serializer_action_classes = {
+        'list': serializers.ExperimentSerializer,
+        'upload_image': serializers.ExperiemntImageSerializer,
+    }
     queryset = Experiment.objects.all()
-    authentication_classes = [TokenAuthentication]
-    permission_classes = [IsAuthenticated]
+    authentication_classes = AUTH
+    permission_classes = PERMS
+    pagination_class = LimitOffsetPagination
+    renderer_classes = (ORJSONRenderer, BrowsableAPIRenderer)
+    # Updates drop prefetched relations before rendering and deletes
+    # render nothing, so only these actions shape their querysets to the
+    # serializer in use.
+    eager_loading_actions = ('retrieve', 'upload_image')
+    # Built once per request by get_queryset.
+    _queryset = None
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers."""
@@ -54,28 +94,89 @@ class ExperimentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retrieve experiments for authenticated user."""
+        if self._queryset is not None:
+            return self._queryset
+
+        user_id = self.request.user.pk
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        queryset = self.queryset.filter(user_id=user_id).order_by('id')
         if tags:
             tag_ids = self._params_to_ints(tags)
             queryset = queryset.filter(tags__id__in=tag_ids)
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        if tags or ingredients:
+            # The joins through relations repeat matching experiments.
+            queryset = queryset.distinct()
+
+        if self.action in self.eager_loading_actions:
+            queryset = self.get_serializer_class().setup_eager_loading(
+                queryset,
+                user_id,
+            )
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('id').distinct()
+        self._queryset = queryset
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
-            return serializers.ExperimentSerializer
-        elif self.action == 'upload_image':
-            return serializers.ExperiemntImageSerializer
+        return self.serializer_action_classes.get(
+            self.action,
+            self.serializer_class,
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List experiments from column values, not model instances."""
+        queryset = self.filter_queryset(self.get_queryset())
+        # Count and slice plain ids; relations are aggregated for the
+        # selected experiments only.
+        page = self.paginate_queryset(queryset.values_list('id', flat=True))
+        if page is not None:
+            queryset = self.queryset.filter(id__in=page).order_by('id')
+        elif queryset.query.distinct:
+            queryset = self.queryset.filter(
+                id__in=queryset.values('id'),
+            ).order_by('id')
 
-        return self.serializer_class
+        serializer_class = self.get_serializer_class()
+        rows = serializer_class.setup_values(queryset, request.user.pk)
+        serializer = self.get_serializer(
+            serializer_class.attach_relations(rows),
+            many=True,
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an experiment, answering 304 if it is unchanged."""
+        lookup = kwargs[self.lookup_field]
+        updated_at = get_object_or_404(
+            self.queryset.filter(user_id=request.user.pk).values_list(
+                'updated_at',
+                flat=True,
+            ),
+            **{self.lookup_field: lookup},
+        )
+        key = f'{request.user.pk}:{lookup}:{updated_at}'
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = int(updated_at.timestamp())
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
 
     def perform_create(self, serializer):
         """Create a new experiment."""
@@ -110,29 +211,71 @@ class BaseExperimentAttrViewSet(mixins.UpdateModelMixin,
                                 mixins.ListModelMixin,
                                 viewsets.GenericViewSet):
     """Base viewset for experiment attributes."""
-    authentication_classes = [TokenAuthentication]
-    permission_classes = [IsAuthenticated]
+    authentication_classes = AUTH
+    permission_classes = PERMS
+    pagination_class = LimitOffsetPagination
+    # Built once per request by get_queryset.
+    _queryset = None
 
     def get_queryset(self):
         """Filter querset to authenticated user."""
+        if self._queryset is not None:
+            return self._queryset
+
         assigned_only = bool(
             int(self.request.query_params.get('assigned_only', 0))
         )
-        queryset = self.queryset
+        # The class-level queryset is an empty placeholder for the router
+        # and schema generation; rows come from the serializer's model.
+        queryset = self.serializer_class.Meta.model.objects.all()
         if assigned_only:
-            queryset = queryset.filter(experiment__isnull=False)
+            # The join through experiments repeats shared rows.
+            queryset = queryset.filter(experiment__isnull=False).distinct()
+
+        # Renames validate uniqueness against the row's user.
+        queryset = queryset.filter(
+            user_id=self.request.user.pk
+            ).only('user', *self.serializer_class.Meta.fields).order_by(
+                Lower('name').desc(),
+                # Names differing only in case would otherwise tie.
+                '-id',
+            )
+        self._queryset = queryset
+        return queryset
+
+    def _list_etag(self):
+        """Return an ETag for the listed rows, computed in the database."""
+        digest = self.filter_queryset(self.get_queryset()).aggregate(
+            digest=MD5(StringAgg(
+                Concat(Cast('id', CharField()), Value(':'), 'name'),
+                delimiter=',',
+                ordering='id',
+            )),
+        )['digest']
+        key = f'{self.request.user.pk}:{self.request.get_full_path()}:{digest}'
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        """List items, answering 304 if the client copy is current."""
+        etag = self._list_etag()
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in client_etags or '*' in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().list(request, *args, **kwargs)
 
-        return queryset.filter(
-            user=self.request.user
-            ).order_by('-name').distinct()
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
 
 
 class TagViewSet(BaseExperimentAttrViewSet):
     serializer_class = serializers.TagSerializer
-    queryset = Tag.objects.all()
+    queryset = Tag.objects.none()
 
 
 class IngredientViewSet(BaseExperimentAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
-    queryset = Ingredient.objects.all()
+    queryset = Ingredient.objects.none()